@@ -1,6 +1,10 @@
 # File paths
 DB_META_FILE = "db_meta.json"
 DATA_DIR = "data"
+DATA_FILE_EXTENSION = ".jsonl"
+
+# Buffered rows per table that force a write inside a transaction
+BUFFER_FLUSH_ROWS = 1000
 
 # Table constants
 ID_COLUMN = "id"
@@ -10,18 +14,34 @@ DEFAULT_COLUMNS = {ID_COLUMN: ID_TYPE}
 # Data types
 SUPPORTED_TYPES = {"int", "str", "float", "bool"}
 
+# Query planning
+SELECTIVITY_DEFAULT = 0.5  # assumed pass rate of a predicate never seen before
+SELECTIVITY_ALPHA = 0.2  # weight of the latest query in the pass-rate EWMA
+
+# Output
+PRETTY_TABLE_MAX_ROWS = 200  # larger results are printed as plain aligned text
+
 # Messages
 SUCCESS_MESSAGES = {
     "table_created": "Table created successfully",
     "table_dropped": "Table dropped successfully",
+    "index_created": "Index created successfully",
     "row_inserted": "Row inserted successfully",
+    "rows_inserted": " rows inserted",
     "rows_updated": " rows updated",
     "rows_deleted": " rows deleted",
+    "cache_dropped": "Cache dropped successfully",
+    "transaction_started": "Transaction started",
+    "transaction_committed": "Transaction committed",
 }
 
 ERROR_MESSAGES = {
     "table_exists": "Table already exists",
     "table_not_exists": "Table does not exist",
+    "index_exists": "Index already exists",
     "invalid_type": "Invalid data type",
     "invalid_syntax": "Invalid syntax",
+    "transaction_active": "Transaction already in progress",
+    "no_transaction": "No transaction in progress",
+    "ddl_in_transaction": "Tables cannot be created or dropped in a transaction",
 }
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from database_engine.constants import (
     ID_COLUMN,
@@ -9,28 +9,41 @@ from database_engine.constants import (
 from database_engine.decorators import handle_db_errors, confirm_action, log_time
 from database_engine.utils import FileManager, DataValidator
 from database_engine.parser import CommandParser
+from database_engine.table import ColumnTable
 
 
 class DatabaseEngine:
     """Main database engine class."""
 
-    def __init__(self):
-        self.parser = CommandParser()
-        self.file_manager = FileManager()
+    def __init__(
+        self,
+        file_manager: Optional[FileManager] = None,
+        parser: Optional[CommandParser] = None,
+    ):
+        self.parser = parser if parser is not None else CommandParser()
+        self.file_manager = file_manager if file_manager is not None else FileManager()
+        # Per-table EWMA of predicate pass rates, used to order AND-ed predicates
+        self._pass_rates: Dict[str, Dict[Tuple, float]] = {}
 
     @handle_db_errors
     @log_time
     def create_table(self, table_name: str, columns: Dict[str, str]) -> str:
         """Create a new table."""
-        if self.file_manager.table_exists(table_name):
+        if self.file_manager.in_transaction:
+            return f"Error: {ERROR_MESSAGES['ddl_in_transaction']}"
+        metadata = self.file_manager.read_table_metadata()
+        if table_name in metadata:
             return f"Error: {ERROR_MESSAGES['table_exists']}"
         all_columns = {**DEFAULT_COLUMNS, **columns}
 
-        metadata = self.file_manager.read_table_metadata()
-        metadata[table_name] = all_columns
+        metadata[table_name] = {
+            "columns": all_columns,
+            "next_id": 1,
+            "indexes": [ID_COLUMN],
+        }
         self.file_manager.write_table_metadata(metadata)
 
-        self.file_manager.write_table_data(table_name, [])
+        self.file_manager.write_table_data(table_name, ColumnTable({}))
 
         return SUCCESS_MESSAGES["table_created"]
 
@@ -38,10 +51,12 @@ class DatabaseEngine:
     @confirm_action("drop this table and all its data")
     def drop_table(self, table_name: str) -> str:
         """Drop an existing table."""
-        if not self.file_manager.table_exists(table_name):
+        if self.file_manager.in_transaction:
+            return f"Error: {ERROR_MESSAGES['ddl_in_transaction']}"
+        metadata = self.file_manager.read_table_metadata()
+        if table_name not in metadata:
             return f"Error: {ERROR_MESSAGES['table_not_exists']}"
 
-        metadata = self.file_manager.read_table_metadata()
         del metadata[table_name]
         self.file_manager.write_table_metadata(metadata)
 
@@ -49,6 +64,25 @@ class DatabaseEngine:
 
         return SUCCESS_MESSAGES["table_dropped"]
 
+    @handle_db_errors
+    def create_index(self, table_name: str, column: str) -> str:
+        """Create a hash index on a table column."""
+        metadata = self.file_manager.read_table_metadata()
+        if table_name not in metadata:
+            return f"Error: {ERROR_MESSAGES['table_not_exists']}"
+
+        table_meta = metadata[table_name]
+        if column not in table_meta["columns"]:
+            return f"Error: Column {column} not found"
+        indexes = table_meta.setdefault("indexes", [ID_COLUMN])
+        if column in indexes:
+            return f"Error: {ERROR_MESSAGES['index_exists']}"
+
+        indexes.append(column)
+        self.file_manager.write_table_metadata(metadata)
+
+        return SUCCESS_MESSAGES["index_created"]
+
     @handle_db_errors
     def list_tables(self) -> List[str]:
         """List all tables."""
@@ -59,52 +93,86 @@ class DatabaseEngine:
     @log_time
     def insert_row(self, table_name: str, values: List[Any]) -> str:
         """Insert a new row into table."""
-        if not self.file_manager.table_exists(table_name):
+        metadata = self.file_manager.read_table_metadata()
+        if table_name not in metadata:
             return f"Error: {ERROR_MESSAGES['table_not_exists']}"
 
-        metadata = self.file_manager.read_table_metadata()
-        columns = metadata[table_name]
-        data = self.file_manager.read_table_data(table_name)
+        table_meta = metadata[table_name]
 
-        validated_data = DataValidator.validate_row_data(columns, values)
+        validated_data = DataValidator.validate_row_data(table_meta["columns"], values)
 
-        new_id = max([row.get(ID_COLUMN, 0) for row in data], default=0) + 1
-        validated_data[ID_COLUMN] = new_id
+        validated_data[ID_COLUMN] = table_meta["next_id"]
+        table_meta["next_id"] += 1
+        self.file_manager.write_table_metadata(metadata)
 
-        data.append(validated_data)
-        self.file_manager.write_table_data(table_name, data)
+        self.file_manager.append_row(table_name, validated_data)
 
         return SUCCESS_MESSAGES["row_inserted"]
 
+    @handle_db_errors
+    @log_time
+    def insert_rows(self, table_name: str, rows: List[List[Any]]) -> str:
+        """Insert several rows into table with a single append."""
+        metadata = self.file_manager.read_table_metadata()
+        if table_name not in metadata:
+            return f"Error: {ERROR_MESSAGES['table_not_exists']}"
+
+        table_meta = metadata[table_name]
+
+        validate = DataValidator.row_validator(table_meta["columns"])
+        validated_rows = [validate(values) for values in rows]
+
+        for validated_data in validated_rows:
+            validated_data[ID_COLUMN] = table_meta["next_id"]
+            table_meta["next_id"] += 1
+        self.file_manager.write_table_metadata(metadata)
+
+        self.file_manager.append_rows(table_name, validated_rows)
+
+        return f"{len(validated_rows)}{SUCCESS_MESSAGES['rows_inserted']}"
+
     @handle_db_errors
     @log_time
     def select_rows(
         self, table_name: str, columns: List[str], where_condition: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Select rows from table."""
-        if not self.file_manager.table_exists(table_name):
+        metadata = self.file_manager.read_table_metadata()
+        if table_name not in metadata:
             raise ValueError(ERROR_MESSAGES["table_not_exists"])
 
-        data = self.file_manager.read_table_data(table_name)
-
-        if where_condition:
-            data = [
-                row
-                for row in data
-                if self.parser.evaluate_condition(row, where_condition)
-            ]
+        table_meta = metadata[table_name]
+        if columns != ["*"]:
+            for col in columns:
+                if col not in table_meta["columns"]:
+                    raise ValueError(f"Column {col} not found")
 
+        data = self.file_manager.read_table_data(table_name)
+        where = self.parser.parse_where(where_condition) if where_condition else None
+
+        positions = mask = None
+        predicate = where.single_predicate() if where else None
+        if (
+            predicate is not None
+            and predicate.op == "="
+            and predicate.column in table_meta.get("indexes", [ID_COLUMN])
+        ):
+            # Equality on an indexed column: look the rows up instead of scanning
+            index = self.file_manager.get_index(table_name, predicate.column, data)
+            positions = index.get(predicate.value, [])
+        elif where is not None:
+            mask = where.mask(data, self._pass_rates.setdefault(table_name, {}))
+
+        # Project before filtering so only the selected columns get copied
         if columns != ["*"]:
-            result = []
-            for row in data:
-                result_row = {}
-                for col in columns:
-                    if col in row:
-                        result_row[col] = row[col]
-                result.append(result_row)
-            return result
+            data = data.project(columns)
+        if positions is not None:
+            data = data.take(positions)
+        elif mask is not None:
+            data = data.filter(mask)
 
-        return data
+        # Fresh dicts, so changes to the result never reach the cached table
+        return data.to_rows()
 
     @handle_db_errors
     @log_time
@@ -115,12 +183,11 @@ class DatabaseEngine:
         where_condition: Optional[str] = None,
     ) -> str:
         """Update rows in table."""
-        if not self.file_manager.table_exists(table_name):
+        metadata = self.file_manager.read_table_metadata()
+        if table_name not in metadata:
             return f"Error: {ERROR_MESSAGES['table_not_exists']}"
 
-        metadata = self.file_manager.read_table_metadata()
-        columns = metadata[table_name]
-        data = self.file_manager.read_table_data(table_name)
+        columns = metadata[table_name]["columns"]
 
         for col_name, new_value in updates.items():
             if col_name not in columns:
@@ -131,15 +198,10 @@ class DatabaseEngine:
             except ValueError as e:
                 return f"Error: {str(e)}"
 
-        updated_count = 0
-        for row in data:
-            if not where_condition or self.parser.evaluate_condition(
-                row, where_condition
-            ):
-                row.update(updates)
-                updated_count += 1
-
-        self.file_manager.write_table_data(table_name, data)
+        predicate = (
+            self.parser.compile_condition(where_condition) if where_condition else None
+        )
+        updated_count = self.file_manager.rewrite_rows(table_name, predicate, updates)
 
         return f"{updated_count}{SUCCESS_MESSAGES['rows_updated']}"
 
@@ -153,18 +215,9 @@ class DatabaseEngine:
         if not self.file_manager.table_exists(table_name):
             return f"Error: {ERROR_MESSAGES['table_not_exists']}"
 
-        data = self.file_manager.read_table_data(table_name)
-
-        if where_condition:
-            new_data = [
-                row
-                for row in data
-                if not self.parser.evaluate_condition(row, where_condition)
-            ]
-            deleted_count = len(data) - len(new_data)
-        else:
-            new_data = []
-            deleted_count = len(data)
-        self.file_manager.write_table_data(table_name, new_data)
+        predicate = (
+            self.parser.compile_condition(where_condition) if where_condition else None
+        )
+        deleted_count = self.file_manager.rewrite_rows(table_name, predicate)
 
         return f"{deleted_count}{SUCCESS_MESSAGES['rows_deleted']}"
@@ -1,9 +1,16 @@
+import logging
+import os
 import time
 from functools import wraps
 from typing import Any, Callable
 
 from database_engine.constants import ERROR_MESSAGES
 
+# Execution time logging is only enabled with DB_ENGINE_PROFILE=1
+PROFILE = os.getenv("DB_ENGINE_PROFILE") == "1"
+
+logger = logging.getLogger(__name__)
+
 
 def handle_db_errors(func: Callable) -> Callable:
     @wraps(func)
@@ -37,25 +44,15 @@ def confirm_action(action: str) -> Callable:
 
 
 def log_time(func: Callable) -> Callable:
+    if not PROFILE:
+        return func
+
     @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"Execution time: {end_time - start_time:.4f} seconds")
+        elapsed = (time.perf_counter_ns() - start_time) / 1e9
+        logger.info("%s execution time: %.6f seconds", func.__name__, elapsed)
         return result
 
     return wrapper
-
-
-def cache_results(func: Callable) -> Callable:
-    cache = {}
-
-    @wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = func(*args, **kwargs)
-        return cache[key]
-
-    return wrapper
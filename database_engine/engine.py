@@ -1,58 +1,124 @@
-from typing import Any
+import re
+from typing import Any, Callable, Dict
 
+from database_engine.constants import SUCCESS_MESSAGES
 from database_engine.core import DatabaseEngine
 from database_engine.parser import CommandParser
 from database_engine.decorators import handle_db_errors
 from database_engine.utils import FileManager
 
+KEYWORD_PATTERN = re.compile(r"\w+")
+
+
+def _is_command(raw: str, keyword: str) -> bool:
+    """Check that a command is exactly the given keywords, in any case."""
+    return " ".join(raw.split()).upper() == keyword
+
 
 class DatabaseSession:
     """Handles database sessions and command execution."""
 
     def __init__(self):
-        self.engine = DatabaseEngine()
-        self.parser = CommandParser()
+        # One FileManager and parser shared with the engine, so caches and
+        # transaction state are the same whichever side touches them
         self.file_manager = FileManager()
+        self.parser = CommandParser()
+        self.engine = DatabaseEngine(file_manager=self.file_manager, parser=self.parser)
 
     @handle_db_errors
     def execute_command(self, command: str) -> Any:
         """Execute a SQL-like command."""
-        command = command.strip().upper()
+        raw = command.strip()
+        match = KEYWORD_PATTERN.match(raw)
+        handler = self._HANDLERS.get(match.group(0).upper()) if match else None
+        if handler is None:
+            return "Error: Unknown command"
 
         try:
-            if command.startswith("CREATE TABLE"):
-                table_name, columns = self.parser.parse_create_table(command)
-                return self.engine.create_table(table_name, columns)
+            return handler(self, raw)
+        except Exception as e:
+            return f"Error: {str(e)}"
 
-            elif command.startswith("DROP TABLE"):
-                table_name = self.parser.parse_drop_table(command)
-                return self.engine.drop_table(table_name)
+    def _handle_create(self, raw: str) -> Any:
+        words = raw.split(None, 2)
+        if len(words) > 1 and words[1].upper() == "INDEX":
+            table_name, column = self.parser.parse_create_index(raw)
+            return self.engine.create_index(table_name, column)
+        table_name, columns = self.parser.parse_create_table(raw)
+        return self.engine.create_table(table_name, columns)
 
-            elif command == "LIST TABLES":
-                tables = self.engine.list_tables()
-                return tables if tables else "No tables exist"
+    def _handle_drop(self, raw: str) -> Any:
+        table_name = self.parser.parse_drop_table(raw)
+        return self.engine.drop_table(table_name)
 
-            elif command.startswith("INSERT INTO"):
-                table_name, values = self.parser.parse_insert(command)
-                return self.engine.insert_row(table_name, values)
+    def _handle_list(self, raw: str) -> Any:
+        if not _is_command(raw, "LIST TABLES"):
+            return "Error: Unknown command"
+        tables = self.engine.list_tables()
+        return tables if tables else "No tables exist"
 
-            elif command.startswith("SELECT"):
-                table_name, columns, where_condition = self.parser.parse_select(command)
-                return self.engine.select_rows(table_name, columns, where_condition)
+    def _handle_insert(self, raw: str) -> Any:
+        table_name, rows = self.parser.parse_insert(raw)
+        if len(rows) == 1:
+            return self.engine.insert_row(table_name, rows[0])
+        return self.engine.insert_rows(table_name, rows)
 
-            elif command.startswith("UPDATE"):
-                table_name, updates, where_condition = self.parser.parse_update(command)
-                return self.engine.update_rows(table_name, updates, where_condition)
+    def _handle_select(self, raw: str) -> Any:
+        table_name, columns, where_condition = self.parser.parse_select(raw)
+        return self.engine.select_rows(table_name, columns, where_condition)
 
-            elif command.startswith("DELETE FROM"):
-                table_name, where_condition = self.parser.parse_delete(command)
-                return self.engine.delete_rows(table_name, where_condition)
+    def _handle_update(self, raw: str) -> Any:
+        table_name, updates, where_condition = self.parser.parse_update(raw)
+        return self.engine.update_rows(table_name, updates, where_condition)
 
-            else:
-                return "Error: Unknown command"
+    def _handle_delete(self, raw: str) -> Any:
+        table_name, where_condition = self.parser.parse_delete(raw)
+        return self.engine.delete_rows(table_name, where_condition)
 
-        except Exception as e:
-            return f"Error: {str(e)}"
+    def _handle_system(self, raw: str) -> Any:
+        if not _is_command(raw, "SYSTEM DROP CACHE"):
+            return "Error: Unknown command"
+        self.file_manager.drop_cache()
+        return SUCCESS_MESSAGES["cache_dropped"]
+
+    def _handle_begin(self, raw: str) -> Any:
+        if not _is_command(raw, "BEGIN"):
+            return "Error: Unknown command"
+        self.begin()
+        return SUCCESS_MESSAGES["transaction_started"]
+
+    def _handle_commit(self, raw: str) -> Any:
+        if not _is_command(raw, "COMMIT"):
+            return "Error: Unknown command"
+        self.commit()
+        return SUCCESS_MESSAGES["transaction_committed"]
+
+    # First word of a command -> handler
+    _HANDLERS: Dict[str, Callable[["DatabaseSession", str], Any]] = {
+        "CREATE": _handle_create,
+        "DROP": _handle_drop,
+        "LIST": _handle_list,
+        "INSERT": _handle_insert,
+        "SELECT": _handle_select,
+        "UPDATE": _handle_update,
+        "DELETE": _handle_delete,
+        "SYSTEM": _handle_system,
+        "BEGIN": _handle_begin,
+        "COMMIT": _handle_commit,
+    }
+
+    def begin(self) -> None:
+        """Buffer inserts until commit()."""
+        self.file_manager.begin()
+
+    def commit(self) -> None:
+        """Write out everything buffered since begin()."""
+        self.file_manager.commit()
+
+    def close(self) -> None:
+        """Commit a transaction left open at the end of the session."""
+        if self.file_manager.in_transaction:
+            self.commit()
 
     def get_table_info(self) -> dict:
         return self.file_manager.read_table_metadata()
@@ -2,11 +2,15 @@
 #Вариант 13-14
 #Таблицы коллекции и экспонаты без связей с другими таблицами.
 
+import logging
+import sys
+
 from prompt_toolkit import prompt
 from prompt_toolkit.history import FileHistory
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
 from prettytable import PrettyTable
 
+from database_engine.constants import PRETTY_TABLE_MAX_ROWS
 from database_engine.engine import DatabaseSession
 from database_engine.decorators import handle_db_errors
 
@@ -27,7 +31,9 @@ class DatabaseCLI:
                 print("No results found")
                 return
 
-            if isinstance(result[0], dict):
+            if isinstance(result[0], dict) and len(result) > PRETTY_TABLE_MAX_ROWS:
+                self.display_plain(result)
+            elif isinstance(result[0], dict):
                 table = PrettyTable()
                 table.field_names = result[0].keys()
                 for row in result:
@@ -39,6 +45,25 @@ class DatabaseCLI:
         else:
             print(result)
 
+    @staticmethod
+    def display_plain(result: list) -> None:
+        """Print rows as aligned text with a single write."""
+        columns = list(result[0].keys())
+        cells = [[str(value) for value in row.values()] for row in result]
+        widths = [len(col) for col in columns]
+        for row in cells:
+            widths = [max(w, len(cell)) for w, cell in zip(widths, row)]
+
+        lines = [
+            " | ".join(col.ljust(w) for col, w in zip(columns, widths)),
+            "-+-".join("-" * w for w in widths),
+        ]
+        lines.extend(
+            " | ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in cells
+        )
+        lines.append(f"({len(result)} rows)")
+        sys.stdout.write("\n".join(lines) + "\n")
+
     @handle_db_errors
     def run(self) -> None:
         """Run the database CLI."""
@@ -70,6 +95,8 @@ class DatabaseCLI:
                 print("\nGoodbye!")
                 break
 
+        self.session.close()
+
     def show_help(self) -> None:
         """Show available commands."""
         help_text = """
@@ -79,6 +106,10 @@ Available Commands:
   Creates a new table with specified columns
   Example: CREATE TABLE users (name str, age int)
 
+- CREATE INDEX ON table_name (column)
+  Builds a hash index for fast "column = value" lookups (id is always indexed)
+  Example: CREATE INDEX ON users (name)
+
 - DROP TABLE table_name
   Deletes a table and all its data
 
@@ -88,10 +119,12 @@ Available Commands:
 - INSERT INTO table_name VALUES (val1, val2, ...)
   Inserts a new row into the table
   Example: INSERT INTO users VALUES ("John", 25)
+  Several rows at once: INSERT INTO users VALUES ("John", 25), ("Jane", 31)
 
 - SELECT * FROM table_name [WHERE condition]
   Selects all rows from table
   Example: SELECT * FROM users WHERE age > 20
+  Conditions can be combined: WHERE age > 20 AND active = true OR age < 5
 
 - SELECT col1, col2 FROM table_name [WHERE condition]
   Selects specific columns from table
@@ -105,12 +138,20 @@ Available Commands:
   Deletes rows from table
   Example: DELETE FROM users WHERE age < 18
 
+- BEGIN / COMMIT
+  Buffers inserts between BEGIN and COMMIT and writes them out together
+  CREATE TABLE and DROP TABLE are refused inside a transaction
+
+- SYSTEM DROP CACHE
+  Forgets cached metadata and table data so they are re-read from disk
+
 Supported data types: int, str, float, bool
         """
         print(help_text)
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     cli = DatabaseCLI()
     cli.run()
 
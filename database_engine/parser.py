@@ -1,59 +1,196 @@
+import operator
 import re
-from typing import Any, Dict, List, Tuple, Optional
-
-from database_engine.constants import ERROR_MESSAGES, SUPPORTED_TYPES
-
-
-class DataValidator:
-    """Validates data types and constraints."""
+from functools import lru_cache
+from itertools import compress, repeat
+from typing import Any, Callable, Dict, List, Tuple, Optional, Sequence
+
+from database_engine.constants import (
+    ERROR_MESSAGES,
+    SUPPORTED_TYPES,
+    SELECTIVITY_DEFAULT,
+    SELECTIVITY_ALPHA,
+)
+from database_engine.table import ColumnTable
+
+# Checked in this order, so two-character operators win over their prefixes
+OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "=": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+Row = Dict[str, Any]
+
+# Command patterns, compiled once at import
+CREATE_TABLE_PATTERN = re.compile(r"CREATE\s+TABLE\s+(\w+)\s*\((.+)\)", re.IGNORECASE)
+CREATE_INDEX_PATTERN = re.compile(
+    r"CREATE\s+INDEX\s+ON\s+(\w+)\s*\(\s*(\w+)\s*\)", re.IGNORECASE
+)
+INSERT_PATTERN = re.compile(r"INSERT INTO (\w+) VALUES\s*(\(.+\))", re.IGNORECASE)
+SELECT_WHERE_PATTERN = re.compile(r"SELECT (.+) FROM (\w+) WHERE (.+)", re.IGNORECASE)
+SELECT_PATTERN = re.compile(r"SELECT (.+) FROM (\w+)", re.IGNORECASE)
+UPDATE_PATTERN = re.compile(
+    r"UPDATE\s+(\w+)\s+SET\s+(.+?)(?:\s+WHERE\s+(.+))?$", re.IGNORECASE
+)
+DELETE_PATTERN = re.compile(r"DELETE FROM (\w+)(?: WHERE (.+))?", re.IGNORECASE)
+DROP_TABLE_PATTERN = re.compile(r"DROP TABLE (\w+)", re.IGNORECASE)
+
+# One comma-separated field of a VALUES list and the delimiter after it.
+# Quoted literals may contain commas; an unterminated quote runs to the end.
+VALUE_PATTERN = re.compile(
+    r"""((?:[^,"'\\]+|"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?|\\.?)*)(,|$)""",
+    re.DOTALL,
+)
+ESCAPE_PATTERN = re.compile(r"\\(.?)", re.DOTALL)
+# One parenthesised row of a multi-row VALUES list. Plain text is matched one
+# character at a time so that no two branches can match the same input, which
+# keeps a failed match (e.g. an unterminated quote) from backtracking
+# exponentially.
+ROW_PATTERN = re.compile(
+    r"""\(((?:[^()"'\\]|"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|\\.)*)\)""",
+    re.DOTALL,
+)
+ROW_SEPARATOR_PATTERN = re.compile(r"\s*,\s*")
+
+# Row test factories: (column, value) -> test, with the comparison inlined
+ROW_TESTS: Dict[str, Callable[[str, Any], Callable[[Row], bool]]] = {
+    ">=": lambda col, val: lambda row: row.get(col) >= val,
+    "<=": lambda col, val: lambda row: row.get(col) <= val,
+    "!=": lambda col, val: lambda row: row.get(col) != val,
+    "=": lambda col, val: lambda row: row.get(col) == val,
+    ">": lambda col, val: lambda row: row.get(col) > val,
+    "<": lambda col, val: lambda row: row.get(col) < val,
+}
+
+# AND/OR between predicates; quoted literals are matched first so they are skipped
+CONNECTIVE_PATTERN = re.compile(
+    r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|\s+(AND|OR)\s+""", re.IGNORECASE
+)
+
+
+class Predicate:
+    """Single WHERE comparison, parsed once and applied to many rows."""
+
+    def __init__(self, column: str, op: str, value: Any):
+        self.column = column
+        self.op = op
+        self.value = value
+        self._compare = OPERATORS[op]
+
+    @classmethod
+    def parse(cls, condition: str) -> Optional["Predicate"]:
+        """Parse 'column op value'; None if the condition has no operator."""
+        parsed = CommandParser.parse_condition(condition)
+        return cls(*parsed) if parsed is not None else None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Key under which the pass rate of this kind of predicate is tracked."""
+        return self.column, self.op
+
+    def compile(self) -> Callable[[Row], bool]:
+        """Return a row test with column, operator and value bound in."""
+        return ROW_TESTS[self.op](self.column, self.value)
+
+    def mask(
+        self, table: ColumnTable, indices: Optional[Sequence[int]] = None
+    ) -> List[bool]:
+        """Evaluate the comparison over a column, or only at the given rows."""
+        values = table.columns.get(self.column)
+        if values is None:
+            values = repeat(None, len(table) if indices is None else len(indices))
+        elif indices is not None:
+            values = map(values.__getitem__, indices)
+        return list(map(self._compare, values, repeat(self.value)))
+
+
+class WhereClause:
+    """WHERE clause: OR-ed groups of AND-ed predicates (AND binds tighter)."""
+
+    def __init__(self, groups: List[List[Predicate]]):
+        self.groups = groups
+
+    @classmethod
+    def parse(cls, condition: str) -> "WhereClause":
+        """Split condition on AND/OR outside quoted literals."""
+        groups: List[List[Predicate]] = [[]]
+        start = 0
+        for match in CONNECTIVE_PATTERN.finditer(condition):
+            connective = match.group(2)
+            if not connective:
+                continue
+            cls._add_predicate(groups[-1], condition[start : match.start()])
+            if connective.upper() == "OR":
+                groups.append([])
+            start = match.end()
+        cls._add_predicate(groups[-1], condition[start:])
+        return cls(groups)
 
     @staticmethod
-    def validate_row_data(
-        columns: Dict[str, str], row_data: List[Any]
-    ) -> Dict[str, Any]:
-        """Validate row data against column definitions."""
-        data_columns = {k: v for k, v in columns.items() if k != "id"}
-
-        if len(row_data) != len(data_columns):
-            raise ValueError(
-                f"Expected {len(data_columns)} values, got {len(row_data)}"
+    def _add_predicate(group: List[Predicate], condition: str) -> None:
+        predicate = Predicate.parse(condition)
+        if predicate is not None:
+            group.append(predicate)
+
+    def compile(self) -> Callable[[Row], bool]:
+        """Return a row test for the whole clause."""
+        groups = [[p.compile() for p in group] for group in self.groups]
+        if any(not tests for tests in groups):
+            return lambda row: True
+        if len(groups) == 1:
+            tests = groups[0]
+            if len(tests) == 1:
+                return tests[0]
+            return lambda row: all(test(row) for test in tests)
+        return lambda row: any(all(test(row) for test in g) for g in groups)
+
+    def single_predicate(self) -> Optional[Predicate]:
+        """Return the predicate if the clause is exactly one comparison."""
+        if len(self.groups) == 1 and len(self.groups[0]) == 1:
+            return self.groups[0][0]
+        return None
+
+    def mask(
+        self, table: ColumnTable, pass_rates: Optional[Dict[Tuple, float]] = None
+    ) -> List[bool]:
+        """Evaluate the clause over the table, short-circuiting AND and OR.
+
+        Within a group the predicate with the lowest pass rate in pass_rates
+        runs first, and every later one only sees rows that are still
+        candidates. Each group only sees rows no earlier group matched.
+        pass_rates is updated with the rates observed by this query.
+        """
+        if pass_rates is None:
+            pass_rates = {}
+        result = [False] * len(table)
+        remaining: Optional[List[int]] = None  # None means every row
+        for group in self.groups:
+            candidates = remaining
+            ordered = sorted(
+                group, key=lambda p: pass_rates.get(p.key, SELECTIVITY_DEFAULT)
             )
-
-        validated_row = {}
-        col_names = list(data_columns.keys())
-
-        for col_name, value in zip(col_names, row_data):
-            expected_type = columns[col_name]
-            validated_row[col_name] = DataValidator._cast_value(value, expected_type)
-
-        return validated_row
-
-    @staticmethod
-    def _cast_value(value: Any, expected_type: str) -> Any:
-        """Cast value to expected type."""
-        if expected_type == "int":
-            try:
-                return int(value)
-            except (ValueError, TypeError):
-                raise ValueError(f"Value {value} cannot be cast to int")
-        elif expected_type == "float":
-            try:
-                return float(value)
-            except (ValueError, TypeError):
-                raise ValueError(f"Value {value} cannot be cast to float")
-        elif expected_type == "bool":
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                if value.lower() in ("true", "1", "yes", "t"):
-                    return True
-                elif value.lower() in ("false", "0", "no", "f"):
-                    return False
-            if isinstance(value, int):
-                return bool(value)
-            raise ValueError(f"Value {value} cannot be cast to bool")
-        else:  # str
-            return str(value)
+            for predicate in ordered:
+                checked = len(table) if candidates is None else len(candidates)
+                if not checked:
+                    break
+                passed = predicate.mask(table, candidates)
+                if candidates is None:
+                    candidates = list(compress(range(len(table)), passed))
+                else:
+                    candidates = list(compress(candidates, passed))
+                rate = pass_rates.get(predicate.key, SELECTIVITY_DEFAULT)
+                pass_rates[predicate.key] = rate + SELECTIVITY_ALPHA * (
+                    len(candidates) / checked - rate
+                )
+            if candidates is None:
+                return [True] * len(table)
+            for i in candidates:
+                result[i] = True
+            remaining = [i for i in range(len(table)) if not result[i]]
+        return result
 
 
 class CommandParser:
@@ -65,8 +202,7 @@ class CommandParser:
 
         Example: CREATE TABLE users (id int, name str, age int)
         """
-        pattern = r"CREATE\s+TABLE\s+(\w+)\s*\((.+)\)"
-        match = re.match(pattern, command, re.IGNORECASE)
+        match = CREATE_TABLE_PATTERN.match(command)
 
         if not match:
             raise ValueError(ERROR_MESSAGES["invalid_syntax"])
@@ -95,26 +231,56 @@ class CommandParser:
         return table_name, columns
 
     @staticmethod
-    def parse_insert(command: str) -> Tuple[str, List[Any]]:
-        """Parse INSERT command.
+    def parse_create_index(command: str) -> Tuple[str, str]:
+        """Parse CREATE INDEX command.
 
-        Example: INSERT INTO users VALUES (1, "John", 25)
+        Example: CREATE INDEX ON users (name)
         """
-        pattern = r"INSERT INTO (\w+) VALUES \((.+)\)"
-        match = re.match(pattern, command, re.IGNORECASE)
+        match = CREATE_INDEX_PATTERN.match(command)
 
         if not match:
             raise ValueError(ERROR_MESSAGES["invalid_syntax"])
 
-        table_name = match.group(1)
-        values_str = match.group(2)
+        return match.group(1), match.group(2)
 
-        # Parse values
-        values = []
-        for value in CommandParser._split_values(values_str):
-            values.append(CommandParser._parse_value(value.strip()))
+    @staticmethod
+    def parse_insert(command: str) -> Tuple[str, List[List[Any]]]:
+        """Parse INSERT command into a list of rows.
 
-        return table_name, values
+        Examples:
+        - INSERT INTO users VALUES ("John", 25)
+        - INSERT INTO users VALUES ("John", 25), ("Jane", 31)
+        """
+        # fullmatch, so trailing text after the last row is a syntax error
+        match = INSERT_PATTERN.fullmatch(command.strip())
+
+        if not match:
+            raise ValueError(ERROR_MESSAGES["invalid_syntax"])
+
+        table_name = match.group(1)
+        rows_str = match.group(2)
+
+        # Rows are matched back to back from where the last one ended, so a
+        # malformed row fails once instead of being rescanned from each "("
+        rows = []
+        pos = 0
+        while True:
+            row_match = ROW_PATTERN.match(rows_str, pos)
+            if not row_match:
+                raise ValueError(ERROR_MESSAGES["invalid_syntax"])
+            values = []
+            for value in CommandParser._split_values(row_match.group(1)):
+                values.append(CommandParser._parse_value(value.strip()))
+            rows.append(values)
+            separator = ROW_SEPARATOR_PATTERN.match(rows_str, row_match.end())
+            if not separator:
+                break
+            pos = separator.end()
+
+        if rows_str[row_match.end() :].strip():
+            raise ValueError(ERROR_MESSAGES["invalid_syntax"])
+
+        return table_name, rows
 
     @staticmethod
     def parse_select(command: str) -> Tuple[str, List[str], Optional[str]]:
@@ -125,8 +291,7 @@ class CommandParser:
         - SELECT name, age FROM users WHERE age > 25
         """
         # Pattern for SELECT with WHERE
-        where_pattern = r"SELECT (.+) FROM (\w+) WHERE (.+)"
-        match = re.match(where_pattern, command, re.IGNORECASE)
+        match = SELECT_WHERE_PATTERN.match(command)
 
         if match:
             columns_str = match.group(1)
@@ -134,8 +299,7 @@ class CommandParser:
             where_condition = match.group(3)
         else:
             # Pattern for SELECT without WHERE
-            simple_pattern = r"SELECT (.+) FROM (\w+)"
-            match = re.match(simple_pattern, command, re.IGNORECASE)
+            match = SELECT_PATTERN.match(command)
             if not match:
                 raise ValueError(ERROR_MESSAGES["invalid_syntax"])
 
@@ -158,8 +322,7 @@ class CommandParser:
         Example: UPDATE users SET age = 26 WHERE name = "John"
         """
         # Improved pattern to handle WHERE clause properly
-        pattern = r"UPDATE\s+(\w+)\s+SET\s+(.+?)(?:\s+WHERE\s+(.+))?$"
-        match = re.match(pattern, command, re.IGNORECASE)
+        match = UPDATE_PATTERN.match(command)
 
         if not match:
             raise ValueError(ERROR_MESSAGES["invalid_syntax"])
@@ -198,8 +361,7 @@ class CommandParser:
         - DELETE FROM users
         - DELETE FROM users WHERE age < 18
         """
-        pattern = r"DELETE FROM (\w+)(?: WHERE (.+))?"
-        match = re.match(pattern, command, re.IGNORECASE)
+        match = DELETE_PATTERN.match(command)
 
         if not match:
             raise ValueError(ERROR_MESSAGES["invalid_syntax"])
@@ -212,8 +374,7 @@ class CommandParser:
     @staticmethod
     def parse_drop_table(command: str) -> str:
         """Parse DROP TABLE command."""
-        pattern = r"DROP TABLE (\w+)"
-        match = re.match(pattern, command, re.IGNORECASE)
+        match = DROP_TABLE_PATTERN.match(command)
 
         if not match:
             raise ValueError(ERROR_MESSAGES["invalid_syntax"])
@@ -224,34 +385,18 @@ class CommandParser:
     def _split_values(values_str: str) -> List[str]:
         """Split values string while respecting quotes."""
         values = []
-        current = ""
-        in_quotes = False
-        quote_char = None
-        escape_char = False
-
-        for i, char in enumerate(values_str):
-            if escape_char:
-                current += char
-                escape_char = False
-            elif char == "\\":
-                escape_char = True
-            elif char in ('"', "'") and not in_quotes:
-                in_quotes = True
-                quote_char = char
-                current += char
-            elif char == quote_char and in_quotes:
-                in_quotes = False
-                quote_char = None
-                current += char
-            elif char == "," and not in_quotes:
-                values.append(current.strip())
-                current = ""
+        for match in VALUE_PATTERN.finditer(values_str):
+            value = match.group(1)
+            if "\\" in value:
+                value = ESCAPE_PATTERN.sub(r"\1", value)
+            value = value.strip()
+            if match.group(2):
+                values.append(value)
             else:
-                current += char
-
-        if current.strip():
-            values.append(current.strip())
-
+                # Last field: kept only if not empty, like a trailing comma
+                if value:
+                    values.append(value)
+                break
         return values
 
     @staticmethod
@@ -282,32 +427,25 @@ class CommandParser:
                 return value
 
     @staticmethod
-    def evaluate_condition(row: Dict[str, Any], condition: str) -> bool:
-        """Evaluate WHERE condition for a row."""
-        operators = [">=", "<=", "!=", "=", ">", "<"]
+    def parse_condition(condition: str) -> Optional[Tuple[str, str, Any]]:
+        """Parse a single comparison into (column, operator, parsed value).
 
-        for op in operators:
+        The value is parsed here, once, so evaluating the comparison on
+        each row is only a lookup and a compare.
+        """
+        for op in OPERATORS:
             if op in condition:
                 left, right = condition.split(op, 1)
-                left = left.strip()
-                right = right.strip()
-
-                # Get actual value from row
-                left_val = row.get(left)
-                right_val = CommandParser._parse_value(right)
-
-                # Compare based on operator
-                if op == "=":
-                    return left_val == right_val
-                elif op == "!=":
-                    return left_val != right_val
-                elif op == ">":
-                    return left_val > right_val
-                elif op == "<":
-                    return left_val < right_val
-                elif op == ">=":
-                    return left_val >= right_val
-                elif op == "<=":
-                    return left_val <= right_val
-
-        return True
+                return left.strip(), op, CommandParser._parse_value(right.strip())
+        return None
+
+    @staticmethod
+    def parse_where(condition: str) -> WhereClause:
+        """Parse WHERE condition into a WhereClause."""
+        return WhereClause.parse(condition)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def compile_condition(condition: str) -> Callable[[Row], bool]:
+        """Compile WHERE condition into a row test, parsing it only once."""
+        return WhereClause.parse(condition).compile()
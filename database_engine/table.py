@@ -0,0 +1,66 @@
+from itertools import compress
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class ColumnTable:
+    """In-memory table stored column by column: one list of values per column."""
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "ColumnTable":
+        """Build a table from row dicts; column order follows the first row."""
+        table = cls({})
+        for row in rows:
+            table.append(row)
+        return table
+
+    def __len__(self) -> int:
+        for values in self.columns.values():
+            return len(values)
+        return 0
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Append a row dict to the end of every column."""
+        if not self.columns:
+            self.columns = {name: [] for name in row}
+        for name, values in self.columns.items():
+            values.append(row.get(name))
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield rows as new dicts, so callers may change them freely."""
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Return all rows as a list of dicts."""
+        return list(self.rows())
+
+    def filter(self, mask: List[bool]) -> "ColumnTable":
+        """Return a new table with the rows where mask is True."""
+        return ColumnTable(
+            {
+                name: list(compress(values, mask))
+                for name, values in self.columns.items()
+            }
+        )
+
+    def take(self, indices: List[int]) -> "ColumnTable":
+        """Return a new table with the rows at the given positions."""
+        return ColumnTable(
+            {
+                name: list(map(values.__getitem__, indices))
+                for name, values in self.columns.items()
+            }
+        )
+
+    def project(self, names: List[str]) -> "ColumnTable":
+        """Return a table sharing the given columns with this one.
+
+        Names must already be checked against the table schema.
+        """
+        if not self.columns:
+            return ColumnTable({})
+        return ColumnTable({name: self.columns[name] for name in names})
@@ -1,14 +1,55 @@
 import json
+import math
 import os
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from database_engine.constants import DB_META_FILE, DATA_DIR
-from database_engine.decorators import handle_db_errors, cache_results
+from database_engine.constants import (
+    DB_META_FILE,
+    DATA_DIR,
+    DATA_FILE_EXTENSION,
+    BUFFER_FLUSH_ROWS,
+    ERROR_MESSAGES,
+    ID_COLUMN,
+)
+from database_engine.decorators import handle_db_errors
+from database_engine.table import ColumnTable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+INT_MIN, INT_MAX = -(2**63), 2**63 - 1
+
+
+def _encode_row(row: Dict[str, Any]) -> bytes:
+    """Encode a row as one line of JSON."""
+    if orjson is not None:
+        return orjson.dumps(row) + b"\n"
+    return json.dumps(row, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _decode_row(line: bytes) -> Dict[str, Any]:
+    """Decode one line of JSON into a row."""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
 
 
 class FileManager:
     """Handles all file operations for the database."""
 
+    def __init__(self):
+        self._meta_cache = None
+        self._meta_mtime = 0
+        self._data_cache: Dict[str, Tuple[int, ColumnTable]] = {}
+        # table -> column -> (indexed table, rows indexed, value -> row positions)
+        self._indexes: Dict[str, Dict[str, Tuple[ColumnTable, int, Dict]]] = {}
+        # Rows appended inside a transaction; None when writes go straight to disk
+        self._pending_writes: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._meta_dirty = False
+        os.makedirs(DATA_DIR, exist_ok=True)
+
     @staticmethod
     @handle_db_errors
     def read_json(filepath: str) -> Any:
@@ -17,99 +58,323 @@ class FileManager:
             return json.load(f)
 
     @staticmethod
-    @handle_db_errors
     def write_json(filepath: str, data: Any) -> None:
         """Write data to JSON file."""
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        dirname = os.path.dirname(filepath)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
-    @staticmethod
     @handle_db_errors
-    @cache_results
-    def read_table_metadata() -> Dict[str, Any]:
-        """Read database metadata."""
-        if not os.path.exists(DB_META_FILE):
+    def read_table_metadata(self) -> Dict[str, Any]:
+        """Read database metadata, reusing the cached copy while it is fresh."""
+        if self._meta_dirty:
+            return self._meta_cache
+        try:
+            mtime = os.stat(DB_META_FILE).st_mtime_ns
+        except FileNotFoundError:
             return {}
-        return FileManager.read_json(DB_META_FILE)
+        if self._meta_cache is not None and mtime == self._meta_mtime:
+            return self._meta_cache
+        self._meta_cache = self.read_json(DB_META_FILE)
+        self._meta_mtime = mtime
+        return self._meta_cache
 
-    @staticmethod
     @handle_db_errors
-    def write_table_metadata(metadata: Dict[str, Any]) -> None:
-        """Write database metadata."""
-        FileManager.write_json(DB_META_FILE, metadata)
+    def write_table_metadata(self, metadata: Dict[str, Any]) -> None:
+        """Write database metadata and refresh the cache."""
+        self._meta_cache = metadata
+        if self.in_transaction:
+            self._meta_dirty = True
+            return
+        self._write_metadata()
+
+    def _write_metadata(self) -> None:
+        """Write the cached metadata to disk."""
+        self.write_json(DB_META_FILE, self._meta_cache)
+        self._meta_mtime = os.stat(DB_META_FILE).st_mtime_ns
+        self._meta_dirty = False
 
     @staticmethod
+    def table_path(table_name: str) -> str:
+        """Return path to the table data file."""
+        return os.path.join(DATA_DIR, f"{table_name}{DATA_FILE_EXTENSION}")
+
+    def _cached_data(self, table_name: str) -> Optional[ColumnTable]:
+        """Return the cached table if its file has not changed since caching."""
+        cached = self._data_cache.get(table_name)
+        if cached is None:
+            return None
+        try:
+            mtime = os.stat(self.table_path(table_name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        return cached[1] if mtime == cached[0] else None
+
+    def _cache_data(self, table_name: str, data: ColumnTable) -> None:
+        """Remember a table together with the current mtime of its file."""
+        mtime = os.stat(self.table_path(table_name)).st_mtime_ns
+        self._data_cache[table_name] = (mtime, data)
+
     @handle_db_errors
-    def read_table_data(table_name: str) -> List[Dict[str, Any]]:
-        """Read table data from file."""
-        filepath = os.path.join(DATA_DIR, f"{table_name}.json")
-        if not os.path.exists(filepath):
-            return []
-        return FileManager.read_json(filepath)
+    def read_table_data(self, table_name: str) -> ColumnTable:
+        """Read table data from file, one JSON row per line.
+
+        The returned table is the cached one; callers must not modify it.
+        """
+        self._flush_table(table_name)
+        data = self._cached_data(table_name)
+        if data is not None:
+            return data
+        try:
+            f = open(self.table_path(table_name), "rb")
+        except FileNotFoundError:
+            return ColumnTable({})
+        with f:
+            data = ColumnTable.from_rows(
+                _decode_row(line) for line in f if line.strip()
+            )
+        self._cache_data(table_name, data)
+        return data
 
-    @staticmethod
     @handle_db_errors
-    def write_table_data(table_name: str, data: List[Dict[str, Any]]) -> None:
-        """Write table data to file."""
-        filepath = os.path.join(DATA_DIR, f"{table_name}.json")
-        FileManager.write_json(filepath, data)
+    def write_table_data(self, table_name: str, data: ColumnTable) -> None:
+        """Write table data to file, one JSON row per line."""
+        self._flush_table(table_name)
+        filepath = self.table_path(table_name)
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.writelines(_encode_row(row) for row in data.rows())
+        os.replace(tmp_path, filepath)
+        self._cache_data(table_name, data)
 
-    @staticmethod
-    def table_exists(table_name: str) -> bool:
-        """Check if table exists."""
-        metadata = FileManager.read_table_metadata()
-        return table_name in metadata
+    def rewrite_rows(
+        self,
+        table_name: str,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]],
+        updates: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Stream the table file through a temp file, one row at a time.
 
-    @staticmethod
-    def delete_table_file(table_name: str) -> None:
+        Rows matching predicate (every row if it is None) are updated with
+        updates, or dropped when updates is None. Other rows are copied
+        through as they are. Returns the number of matching rows.
+        """
+        self._flush_table(table_name)
+        filepath = self.table_path(table_name)
+        tmp_path = filepath + ".tmp"
+        matched = 0
+        try:
+            with open(filepath, "rb") as src, open(tmp_path, "wb") as dst:
+                for line in src:
+                    if not line.strip():
+                        continue
+                    row = _decode_row(line)
+                    if predicate is not None and not predicate(row):
+                        dst.write(line)
+                        continue
+                    matched += 1
+                    if updates is not None:
+                        row.update(updates)
+                        dst.write(_encode_row(row))
+            os.replace(tmp_path, filepath)
+        finally:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+        self._data_cache.pop(table_name, None)
+        self._indexes.pop(table_name, None)
+        return matched
+
+    def get_index(
+        self, table_name: str, column: str, data: ColumnTable
+    ) -> Dict[Any, List[int]]:
+        """Return a hash index {value: [row positions]} over a column of data.
+
+        data is the table as returned by read_table_data, so the positions
+        always point into that same object. The index is extended when rows
+        have been appended to it since, and rebuilt for any other table.
+        """
+        indexes = self._indexes.setdefault(table_name, {})
+        entry = indexes.get(column)
+        if entry is not None and entry[0] is data:
+            _, start, index = entry
+        else:
+            start, index = 0, {}
+        values = data.columns.get(column, [])
+        for i in range(start, len(values)):
+            index.setdefault(values[i], []).append(i)
+        indexes[column] = (data, len(data), index)
+        return index
+
+    def append_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> None:
+        """Append rows to the end of the table file.
+
+        Inside a transaction the rows are buffered and written on commit,
+        or once BUFFER_FLUSH_ROWS of them have piled up for the table.
+        """
+        if self._pending_writes is None:
+            self._write_rows(table_name, rows)
+            return
+        pending = self._pending_writes.setdefault(table_name, [])
+        pending.extend(rows)
+        if len(pending) >= BUFFER_FLUSH_ROWS:
+            self._flush_table(table_name)
+
+    def append_row(self, table_name: str, row: Dict[str, Any]) -> None:
+        """Append a single row to the end of the table file."""
+        self.append_rows(table_name, [row])
+
+    def _write_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> None:
+        """Append rows to the table file with a single write."""
+        filepath = self.table_path(table_name)
+        data = self._cached_data(table_name)
+        with open(filepath, "ab") as f:
+            f.write(b"".join(_encode_row(row) for row in rows))
+        if data is None:
+            self._data_cache.pop(table_name, None)
+        else:
+            for row in rows:
+                data.append(row)
+            self._cache_data(table_name, data)
+
+    def _flush_table(self, table_name: str) -> None:
+        """Write out rows buffered for one table.
+
+        Metadata held back by the transaction goes first, so next_id on disk
+        is never behind the ids of rows already in the file.
+        """
+        if self._pending_writes:
+            rows = self._pending_writes.get(table_name)
+            if rows:
+                if self._meta_dirty:
+                    self._write_metadata()
+                self._write_rows(table_name, rows)
+            self._pending_writes.pop(table_name, None)
+
+    @property
+    def in_transaction(self) -> bool:
+        """Whether writes are currently being buffered."""
+        return self._pending_writes is not None
+
+    def begin(self) -> None:
+        """Start buffering appended rows and metadata writes."""
+        if self.in_transaction:
+            raise ValueError(ERROR_MESSAGES["transaction_active"])
+        self._pending_writes = {}
+
+    def commit(self) -> None:
+        """Write out everything buffered since begin()."""
+        if not self.in_transaction:
+            raise ValueError(ERROR_MESSAGES["no_transaction"])
+        if self._meta_dirty:
+            self._write_metadata()
+        self.flush()
+        self._pending_writes = None
+
+    def flush(self) -> None:
+        """Write out rows buffered for all tables."""
+        for table_name in list(self._pending_writes or {}):
+            self._flush_table(table_name)
+
+    def drop_cache(self) -> None:
+        """Forget all cached metadata and table data."""
+        if self.in_transaction:
+            raise ValueError(ERROR_MESSAGES["transaction_active"])
+        self._meta_cache = None
+        self._meta_mtime = 0
+        self._data_cache.clear()
+        self._indexes.clear()
+
+    def table_exists(self, table_name: str) -> bool:
+        """Check if table exists in the (cached) metadata."""
+        return table_name in self.read_table_metadata()
+
+    def delete_table_file(self, table_name: str) -> None:
         """Delete table data file."""
-        filepath = os.path.join(DATA_DIR, f"{table_name}.json")
-        if os.path.exists(filepath):
+        filepath = self.table_path(table_name)
+        self._data_cache.pop(table_name, None)
+        self._indexes.pop(table_name, None)
+        if self._pending_writes:
+            self._pending_writes.pop(table_name, None)
+        try:
             os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+
+def _to_int(value: Any) -> int:
+    try:
+        result = int(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Value {value} cannot be cast to int")
+    if not INT_MIN <= result <= INT_MAX:
+        raise ValueError(f"Value {value} is out of range for int")
+    return result
+
+
+def _to_float(value: Any) -> float:
+    try:
+        result = float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Value {value} cannot be cast to float")
+    if not math.isfinite(result):
+        raise ValueError(f"Value {value} is not a finite float")
+    return result
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered in ("true", "1", "yes"):
+            return True
+        elif lowered in ("false", "0", "no"):
+            return False
+    raise ValueError(f"Value {value} cannot be cast to bool")
+
+
+_CASTERS: Dict[str, Callable[[Any], Any]] = {
+    "int": _to_int,
+    "float": _to_float,
+    "bool": _to_bool,
+    "str": str,
+}
 
 
 class DataValidator:
     """Validates data types and constraints."""
 
+    @staticmethod
+    def row_validator(columns: Dict[str, str]) -> Callable[[List[Any]], Dict[str, Any]]:
+        """Resolve per-column casters once; return a function validating rows."""
+        col_names = [name for name in columns if name != ID_COLUMN]
+        casters = [_CASTERS.get(columns[name], str) for name in col_names]
+        named_casters = list(zip(col_names, casters))
+
+        def validate(row_data: List[Any]) -> Dict[str, Any]:
+            if len(row_data) != len(named_casters):
+                raise ValueError(
+                    f"Expected {len(named_casters)} values, got {len(row_data)}"
+                )
+            return {
+                name: caster(value)
+                for (name, caster), value in zip(named_casters, row_data)
+            }
+
+        return validate
+
     @staticmethod
     def validate_row_data(
         columns: Dict[str, str], row_data: List[Any]
     ) -> Dict[str, Any]:
         """Validate row data against column definitions."""
-        if len(row_data) != len(columns) - 1:  # -1 for auto ID
-            raise ValueError(f"Expected {len(columns) - 1} values, got {len(row_data)}")
-
-        validated_row = {}
-        col_names = [name for name in columns.keys() if name != "id"]
-
-        for col_name, value in zip(col_names, row_data):
-            expected_type = columns[col_name]
-            validated_row[col_name] = DataValidator._cast_value(value, expected_type)
-
-        return validated_row
+        return DataValidator.row_validator(columns)(row_data)
 
     @staticmethod
     def _cast_value(value: Any, expected_type: str) -> Any:
         """Cast value to expected type."""
-        if expected_type == "int":
-            try:
-                return int(value)
-            except (ValueError, TypeError):
-                raise ValueError(f"Value {value} cannot be cast to int")
-        elif expected_type == "float":
-            try:
-                return float(value)
-            except (ValueError, TypeError):
-                raise ValueError(f"Value {value} cannot be cast to float")
-        elif expected_type == "bool":
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                if value.lower() in ("true", "1", "yes"):
-                    return True
-                elif value.lower() in ("false", "0", "no"):
-                    return False
-            raise ValueError(f"Value {value} cannot be cast to bool")
-        else:  # str
-            return str(value)
+        return _CASTERS.get(expected_type, str)(value)